@@ -8,10 +8,13 @@ from .config import (
     TRADES_FILE,
     GROQ_API_KEY,
     MODEL_CONFIG,
+    LLM_REQUEST_CONFIG,
     CHATBOT_CONFIG,
+    PARTITION_CONFIG,
     DATE_FORMAT_CONFIG,
     RESPONSE_CONFIG,
     SYSTEM_PROMPT_TEMPLATE,
+    DECOMPOSITION_PROMPT_TEMPLATE,
     LOGGING_CONFIG,
 )
 
@@ -22,9 +25,12 @@ __all__ = [
     "TRADES_FILE",
     "GROQ_API_KEY",
     "MODEL_CONFIG",
+    "LLM_REQUEST_CONFIG",
     "CHATBOT_CONFIG",
+    "PARTITION_CONFIG",
     "DATE_FORMAT_CONFIG",
     "RESPONSE_CONFIG",
     "SYSTEM_PROMPT_TEMPLATE",
+    "DECOMPOSITION_PROMPT_TEMPLATE",
     "LOGGING_CONFIG",
 ]
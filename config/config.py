@@ -20,17 +20,44 @@ TRADES_FILE = DATA_DIR / "trades.csv"
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 
 # Model Configuration
+# "models" is tried in order: the first is the primary, the rest are used
+# for hedged requests and failover
 MODEL_CONFIG = {
-    "model_name": "llama-3.3-70b-versatile",
+    "models": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"],
     "temperature": 0.1,
     "max_tokens": None,
 }
 
+# LLM request layer configuration (seconds)
+LLM_REQUEST_CONFIG = {
+    "deadline": 30.0,
+    "request_timeout": 20.0,
+    "hedge_delay": 2.0,
+    "max_retries": 2,
+    "backoff_base": 0.5,
+    "backoff_max": 4.0,
+    "max_connections": 10,
+    "max_keepalive_connections": 5,
+    "keepalive_expiry": 60.0,
+}
+
 # Chatbot Configuration
 CHATBOT_CONFIG = {
     "show_code_by_default": False,
     "enable_date_normalization": True,
     "enable_case_insensitive_search": True,
+    "enable_query_decomposition": True,
+    "entity_columns": ["PortfolioName"],
+}
+
+# Holdings partitioning configuration
+PARTITION_CONFIG = {
+    "enabled": True,
+    "partition_dir": DATA_DIR / "holdings_partitions",
+    "partition_column": "AsOfDate",
+    "prunable_columns": ["AsOfDate", "OpenDate"],
+    "cache_size": 2,
+    "full_scan_cache_max_rows": 0,
 }
 
 # Date handling configuration
@@ -93,6 +120,33 @@ result = "Sorry, cannot find the answer"
 Return ONLY executable Python code.
 """
 
+# Appended to the system prompt for compound / multi-entity questions
+DECOMPOSITION_PROMPT_TEMPLATE = """
+🔥 COMPOUND QUESTION RULES:
+- The question contains several sub-questions and/or several entities
+- Split it into short self-contained sub-questions (one per entity and metric), in the order asked
+- Answer ALL sub-questions in ONE block of code
+- Never filter the same dataframe once per entity. Scan it once:
+  use split_by(df, column, [names]) (one case-insensitive groupby) or a single
+  groupby over the union of the entities
+- Apply any AsOfDate/OpenDate filter first and pass the filtered dataframe to split_by,
+  e.g. split_by(holdings_df[holdings_df['AsOfDate'] == pd.to_datetime('01/08/23')], 'PortfolioName', names)
+- Store answers in dict 'results' mapping each sub-question to its answer (instead of 'result')
+
+COMPOUND EXAMPLE:
+```python
+# User says: "total holdings on 01/08/23 and trades for Garfield and HoldCo 1"
+names = ['Garfield', 'HoldCo 1']
+asof = pd.to_datetime('01/08/23')
+holdings = split_by(holdings_df[holdings_df['AsOfDate'] == asof], 'PortfolioName', names)
+trades = split_by(trades_df, 'PortfolioName', names)
+results = {{}}
+for name in names:
+    results[f"Total holdings for {{name}} on 01/08/23"] = len(holdings[name])
+    results[f"Total trades for {{name}}"] = len(trades[name])
+```
+"""
+
 # Logging configuration
 LOGGING_CONFIG = {
     "level": "INFO",
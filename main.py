@@ -5,17 +5,21 @@ Interactive mode for asking questions about financial data
 import sys
 import argparse
 import pandas as pd
-from groq import Groq
 
-from config import GROQ_API_KEY, HOLDINGS_FILE, TRADES_FILE
-from src import GrokFinancialChatbot, validate_dataframes, get_data_summary
+from config import GROQ_API_KEY, HOLDINGS_FILE, TRADES_FILE, PARTITION_CONFIG
+from src import GrokFinancialChatbot, create_groq_client, HoldingsPartitionStore, validate_dataframes, get_data_summary
 
 
 def load_data():
     """Load the CSV data files"""
     print("\n📂 Loading data...")
     try:
-        holdings_df = pd.read_csv(HOLDINGS_FILE)
+        holdings_store = None
+        if PARTITION_CONFIG['enabled']:
+            holdings_store = HoldingsPartitionStore.from_csv(HOLDINGS_FILE)
+            holdings_df = holdings_store.latest()
+        else:
+            holdings_df = pd.read_csv(HOLDINGS_FILE)
         trades_df = pd.read_csv(TRADES_FILE)
         
         # Validate dataframes
@@ -24,10 +28,14 @@ def load_data():
             print(f"❌ Error: {error_msg}")
             sys.exit(1)
         
-        print(f"✅ Holdings: {len(holdings_df):,} records")
+        if holdings_store is not None:
+            print(f"✅ Holdings: {holdings_store.num_rows:,} records in {len(holdings_store.keys)} AsOfDate partitions "
+                  f"(latest {holdings_store.latest_key()} resident: {len(holdings_df):,} records)")
+        else:
+            print(f"✅ Holdings: {len(holdings_df):,} records")
         print(f"✅ Trades: {len(trades_df):,} records")
         
-        return holdings_df, trades_df
+        return holdings_df, trades_df, holdings_store
     except FileNotFoundError as e:
         print(f"❌ Error: Data file not found - {e}")
         sys.exit(1)
@@ -36,7 +44,7 @@ def load_data():
         sys.exit(1)
 
 
-def initialize_chatbot(holdings_df, trades_df):
+def initialize_chatbot(holdings_df, trades_df, holdings_store=None):
     """Initialize the chatbot with data"""
     if not GROQ_API_KEY:
         print("❌ Error: GROQ_API_KEY not found in environment variables")
@@ -44,10 +52,10 @@ def initialize_chatbot(holdings_df, trades_df):
         sys.exit(1)
     
     try:
-        client = Groq(api_key=GROQ_API_KEY)
+        client = create_groq_client(GROQ_API_KEY)
         print("✅ Groq API initialized")
         
-        chatbot = GrokFinancialChatbot(holdings_df, trades_df, client)
+        chatbot = GrokFinancialChatbot(holdings_df, trades_df, client, holdings_store=holdings_store)
         return chatbot
     except Exception as e:
         print(f"❌ Error initializing chatbot: {e}")
@@ -85,7 +93,7 @@ def interactive_mode(chatbot):
                 continue
             
             if question.lower() == 'summary':
-                summary = get_data_summary(chatbot.holdings_df, chatbot.trades_df)
+                summary = get_data_summary(chatbot.holdings_df, chatbot.trades_df, chatbot.holdings_store)
                 print(summary)
                 continue
             
@@ -129,24 +137,27 @@ def main():
     print("="*80)
     
     # Load data
-    holdings_df, trades_df = load_data()
+    holdings_df, trades_df, holdings_store = load_data()
     
     # Initialize chatbot
-    chatbot = initialize_chatbot(holdings_df, trades_df)
+    chatbot = initialize_chatbot(holdings_df, trades_df, holdings_store)
     print("\n🎉 Chatbot ready!")
     
     # Show summary if requested
     if args.show_summary:
-        summary = get_data_summary(holdings_df, trades_df)
+        summary = get_data_summary(holdings_df, trades_df, holdings_store)
         print(summary)
     
     # Run in selected mode
-    if args.mode == 'interactive':
-        interactive_mode(chatbot)
-    elif args.mode == 'test':
-        print("\n🧪 Running tests...")
-        from tests import run_all_tests
-        run_all_tests()
+    try:
+        if args.mode == 'interactive':
+            interactive_mode(chatbot)
+        elif args.mode == 'test':
+            print("\n🧪 Running tests...")
+            from tests import run_all_tests
+            run_all_tests()
+    finally:
+        chatbot.close()
 
 
 if __name__ == "__main__":
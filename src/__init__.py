@@ -2,10 +2,20 @@
 Source package initialization
 """
 from .chatbot import GrokFinancialChatbot
+from .decompose import SharedScan, find_entities, is_compound_question
+from .llm_client import LLMRequestLayer, create_groq_client
+from .partitions import HoldingsPartitionStore, extract_date_ranges
 from .utils import format_result, clean_code, validate_dataframes, get_data_summary
 
 __all__ = [
     "GrokFinancialChatbot",
+    "SharedScan",
+    "find_entities",
+    "is_compound_question",
+    "LLMRequestLayer",
+    "create_groq_client",
+    "HoldingsPartitionStore",
+    "extract_date_ranges",
     "format_result",
     "clean_code",
     "validate_dataframes",
@@ -12,7 +12,11 @@ from config import (
     MODEL_CONFIG,
     CHATBOT_CONFIG,
     SYSTEM_PROMPT_TEMPLATE,
+    DECOMPOSITION_PROMPT_TEMPLATE,
 )
+from .decompose import SharedScan, is_compound_question
+from .llm_client import LLMRequestLayer
+from .partitions import HoldingsPartitionStore
 from .utils import format_result, clean_code
 
 warnings.filterwarnings('ignore')
@@ -23,18 +27,22 @@ class GrokFinancialChatbot:
     A chatbot that uses Groq LLM to answer questions about financial data
     """
     
-    def __init__(self, holdings_df: pd.DataFrame, trades_df: pd.DataFrame, grok_client: Groq):
+    def __init__(self, holdings_df: pd.DataFrame, trades_df: pd.DataFrame, grok_client: Groq,
+                 holdings_store: HoldingsPartitionStore = None):
         """
         Initialize the chatbot
         
         Args:
-            holdings_df: DataFrame containing holdings data
+            holdings_df: DataFrame containing holdings data (the latest snapshot when holdings_store is given)
             trades_df: DataFrame containing trades data
-            grok_client: Initialized Groq API client
+            grok_client: Initialized Groq or AsyncGroq API client (see create_groq_client)
+            holdings_store: Optional AsOfDate-partitioned holdings; queries load only matching partitions
         """
         self.holdings_df = holdings_df.copy()
         self.trades_df = trades_df.copy()
         self.client = grok_client
+        self.llm = LLMRequestLayer(grok_client)
+        self.holdings_store = holdings_store
         
         print("\n🔧 Applying fixes...")
         
@@ -46,6 +54,7 @@ class GrokFinancialChatbot:
         if CHATBOT_CONFIG['enable_case_insensitive_search']:
             self._build_lookup_maps()
         
+        self.entities = self._collect_entities()
         self.schema = self._get_schema()
         print("✅ Chatbot initialized with all fixes applied")
     
@@ -68,57 +77,88 @@ class GrokFinancialChatbot:
         
         print(f"  ✓ Built column maps")
     
+    def _collect_entities(self) -> list:
+        """Known entity names (e.g. portfolios) used to spot multi-entity questions"""
+        entities = set()
+        for df in (self.holdings_df, self.trades_df):
+            for col in CHATBOT_CONFIG['entity_columns']:
+                if col in df.columns:
+                    entities.update(df[col].dropna().astype(str).str.strip())
+        entities.discard("")
+        return sorted(entities)
+    
+    def close(self):
+        """Release the LLM request threads and HTTP connections"""
+        self.llm.close()
+    
     def _get_schema(self) -> str:
         """Generate enhanced schema with date info"""
+        holdings_info = f"{len(self.holdings_df)} records"
+        if self.holdings_store is not None:
+            dates = [k for k in self.holdings_store.keys if k is not None]
+            holdings_info = (
+                f"{self.holdings_store.num_rows} records, {len(dates)} AsOfDate snapshots "
+                f"from {dates[0] if dates else 'n/a'} to {dates[-1] if dates else 'n/a'}"
+            )
         return f"""
 DATASETS AVAILABLE:
 
-1. holdings_df ({len(self.holdings_df)} records)
+1. holdings_df ({holdings_info})
    Columns: {', '.join(self.holdings_df.columns)}
    
 2. trades_df ({len(self.trades_df)} records)
    Columns: {', '.join(self.trades_df.columns)}
 
 IMPORTANT: All dates are normalized to datetime objects.
+Filter holdings_df directly on AsOfDate/OpenDate (e.g. holdings_df[holdings_df['AsOfDate'] == ...]) when the question targets specific dates.
 """
     
-    def _call_grok(self, user_query: str) -> str:
+    def _call_grok(self, user_query: str, compound: bool = False) -> str:
         """
         Call Groq with enhanced date-handling instructions
         
         Args:
             user_query: The user's question
+            compound: Ask for all sub-questions to be answered in one block of code
             
         Returns:
             Generated Python code
         """
-        system_prompt = SYSTEM_PROMPT_TEMPLATE.format(schema=self.schema)
+        template = SYSTEM_PROMPT_TEMPLATE
+        if compound:
+            template += DECOMPOSITION_PROMPT_TEMPLATE
+        system_prompt = template.format(schema=self.schema)
         
-        response = self.client.chat.completions.create(
-            model=MODEL_CONFIG['model_name'],
-            messages=[
+        code = self.llm.complete(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_query}
             ],
             temperature=MODEL_CONFIG['temperature']
         )
         
-        code = response.choices[0].message.content.strip()
-        return clean_code(code)
+        return clean_code(code.strip())
+    
+    def _holdings_for(self, code: str) -> pd.DataFrame:
+        """Holdings visible to the generated code, pruned to matching AsOfDate partitions"""
+        if self.holdings_store is None:
+            return self.holdings_df
+        return self.holdings_store.scan_for_code(code)
     
-    def _execute_code(self, code: str):
+    def _execute_code(self, code: str, compound: bool = False):
         """
         Safely execute generated code
         
         Args:
             code: Python code to execute
+            compound: Return the 'results' dict of sub-question answers when present
             
         Returns:
-            Result of code execution or error message
+            Result of code execution (or dict of sub-question results) or error message
         """
         try:
             local_vars = {
-                "holdings_df": self.holdings_df,
+                "holdings_df": self._holdings_for(code),
                 "trades_df": self.trades_df,
                 "pd": pd,
                 "np": np,
@@ -126,10 +166,14 @@ IMPORTANT: All dates are normalized to datetime objects.
                 "sum": sum,
                 "min": min,
                 "max": max,
-                "datetime": datetime
+                "datetime": datetime,
+                "split_by": SharedScan().split_by,
             }
             
-            exec(code, {}, local_vars)
+            # One namespace so lambdas/comprehensions can see earlier variables
+            exec(code, local_vars)
+            if compound and isinstance(local_vars.get("results"), dict):
+                return local_vars["results"]
             return local_vars.get("result", "No result variable found")
             
         except Exception as e:
@@ -152,12 +196,13 @@ IMPORTANT: All dates are normalized to datetime objects.
         print(f"\n🤔 Question: {query}")
         print("   Thinking...")
         
-        code = self._call_grok(query)
+        compound = CHATBOT_CONFIG['enable_query_decomposition'] and is_compound_question(query, self.entities)
+        code = self._call_grok(query, compound=compound)
         
         if show_code:
             print(f"\n📝 Generated Code:\n{code}\n")
         
-        result = self._execute_code(code)
+        result = self._execute_code(code, compound=compound)
         formatted = format_result(result)
         
         return formatted
@@ -0,0 +1,94 @@
+"""
+Compound question detection and shared-scan helpers for batched sub-queries
+"""
+import re
+
+import pandas as pd
+
+
+# Punctuation that ends one sub-question and starts another
+_CLAUSE_PATTERN = re.compile(r"[;?]")
+# Trailing remarks like "?Thanks" are not sub-questions
+_MIN_CLAUSE_WORDS = 3
+
+
+def find_entities(query: str, entities: list) -> list:
+    """
+    Find known entity names (e.g. PortfolioName values) mentioned in a question
+
+    Matching is case-insensitive on whole words, longest names first, so
+    "HoldCo 1" does not also match inside "HoldCo 10".
+
+    Args:
+        query: The user's question
+        entities: Known entity names
+
+    Returns:
+        Distinct entity names found, in the order they appear
+    """
+    text = query.lower()
+    found = []
+    for name in sorted({str(e).strip() for e in entities if str(e).strip()}, key=len, reverse=True):
+        pattern = re.compile(r"(?<!\w)" + re.escape(name.lower()) + r"(?!\w)")
+        match = pattern.search(text)
+        if match:
+            found.append((match.start(), name))
+            # Blank out the match so shorter names cannot match inside it
+            text = pattern.sub(lambda m: " " * len(m.group()), text)
+    return [name for _, name in sorted(found)]
+
+
+def is_compound_question(query: str, entities: list = None) -> bool:
+    """
+    Guess whether a question bundles several sub-questions or entities
+
+    A question is compound when it mentions two or more known entities, or
+    has two clauses of at least three words separated by a semicolon or
+    question mark. Connectives alone ("Profit and Loss", "between ... and
+    ...") do not count.
+
+    Args:
+        query: The user's question
+        entities: Known entity names, e.g. the PortfolioName values
+
+    Returns:
+        True if the question should be decomposed into sub-queries
+    """
+    query = query.strip()
+    if entities and len(find_entities(query, entities)) >= 2:
+        return True
+    clauses = [c for c in _CLAUSE_PATTERN.split(query) if len(c.split()) >= _MIN_CLAUSE_WORDS]
+    return len(clauses) >= 2
+
+
+class SharedScan:
+    """
+    Memoizes one case-insensitive groupby per (dataframe, column)
+
+    Exposed to generated code as ``split_by`` so sub-queries over the same
+    dataset and column share a single scan instead of filtering once each.
+    """
+
+    def __init__(self):
+        self._indices = {}
+
+    def split_by(self, df: pd.DataFrame, column: str, values: list) -> dict:
+        """
+        Split df into per-entity frames using a single grouping pass
+
+        Args:
+            df: DataFrame to split
+            column: Column holding the entity names
+            values: Entity names to return (matched case-insensitively)
+
+        Returns:
+            Dict of each requested value to its rows (empty frame if no match)
+        """
+        key = (id(df), column)
+        if key not in self._indices:
+            keys = df[column].astype(str).str.strip().str.lower()
+            # Keep a reference to df so its id cannot be reused while cached
+            self._indices[key] = (df, keys.groupby(keys, sort=False).indices)
+        _, indices = self._indices[key]
+
+        return {v: df.iloc[indices.get(str(v).strip().lower(), [])] for v in values}
@@ -0,0 +1,190 @@
+"""
+Request layer for Groq LLM calls: pooled client, deadlines, hedging and retries
+"""
+import asyncio
+import random
+import threading
+import time
+
+import httpx
+from groq import Groq, AsyncGroq, APIConnectionError, RateLimitError, InternalServerError
+
+from config import MODEL_CONFIG, LLM_REQUEST_CONFIG
+
+
+# Errors worth retrying on; anything else (bad request, authentication, ...)
+# still fails over to the next model but is not retried
+TRANSIENT_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+
+def create_groq_client(api_key: str, base_url: str = None, config: dict = None) -> AsyncGroq:
+    """
+    Create an async Groq client backed by a pooled keep-alive HTTP client
+
+    Args:
+        api_key: Groq API key
+        base_url: Optional API base URL (e.g. a local stub server)
+        config: Overrides for LLM_REQUEST_CONFIG
+
+    Returns:
+        AsyncGroq client with SDK retries disabled (LLMRequestLayer retries instead)
+    """
+    cfg = {**LLM_REQUEST_CONFIG, **(config or {})}
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=cfg['max_connections'],
+            max_keepalive_connections=cfg['max_keepalive_connections'],
+            keepalive_expiry=cfg['keepalive_expiry'],
+        ),
+        timeout=cfg['request_timeout'],
+    )
+    return AsyncGroq(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+
+
+class LLMRequestLayer:
+    """
+    Sends chat completions with a per-call deadline, hedging and jittered retries
+
+    The first model in the ordered model list is tried first. If it has not
+    answered after ``hedge_delay`` seconds (or fails), the next model is
+    fired as well and whichever succeeds first wins.
+
+    Requests run as tasks on a private event loop, so a losing request is
+    cancelled outright and its connection is released instead of running
+    on until ``request_timeout``.
+    """
+
+    def __init__(self, client, models: list = None, config: dict = None):
+        """
+        Initialize the request layer
+
+        Args:
+            client: AsyncGroq client (see create_groq_client); a sync Groq client is
+                    replaced by a pooled AsyncGroq with the same key and base URL.
+                    Closed by close()
+            models: Ordered model names to try (uses MODEL_CONFIG if None)
+            config: Overrides for LLM_REQUEST_CONFIG
+        """
+        self.config = {**LLM_REQUEST_CONFIG, **(config or {})}
+        if isinstance(client, Groq):
+            client = create_groq_client(client.api_key, str(client.base_url), self.config)
+        self.client = client.with_options(max_retries=0)
+        self.models = list(models or MODEL_CONFIG['models'])
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-request", daemon=True)
+        self._thread.start()
+
+    def complete(self, messages: list, temperature: float = None) -> str:
+        """
+        Get a chat completion, retrying transient failures until the deadline
+
+        Args:
+            messages: Chat messages to send
+            temperature: Sampling temperature (uses MODEL_CONFIG if None)
+
+        Returns:
+            Content of the first successful response
+        """
+        if temperature is None:
+            temperature = MODEL_CONFIG['temperature']
+        if self._loop.is_closed():
+            raise RuntimeError("LLMRequestLayer is closed")
+        return asyncio.run_coroutine_threadsafe(self._complete(messages, temperature), self._loop).result()
+
+    async def _complete(self, messages: list, temperature: float) -> str:
+        deadline = time.monotonic() + self.config['deadline']
+        last_error = None
+        for attempt in range(self.config['max_retries'] + 1):
+            try:
+                return await self._hedged(messages, temperature, deadline)
+            except TRANSIENT_ERRORS as e:
+                last_error = e
+
+            remaining = deadline - time.monotonic()
+            if attempt == self.config['max_retries'] or remaining <= 0:
+                break
+            await asyncio.sleep(min(self._backoff(attempt), remaining))
+
+        if last_error is not None and time.monotonic() < deadline:
+            raise last_error
+        raise TimeoutError(f"No LLM response within {self.config['deadline']}s") from last_error
+
+    async def _hedged(self, messages: list, temperature: float, deadline: float) -> str:
+        """
+        Run one hedged round across the model list
+
+        Errors from one model never end the round while another request is
+        still in flight. Once all have failed, a transient error is raised
+        (so _complete() retries) in preference to a non-transient one.
+        """
+        models = list(self.models)
+        pending = {self._submit(models.pop(0), messages, temperature, deadline)}
+        transient_error = None
+        fatal_error = None
+
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                timeout = min(self.config['hedge_delay'], remaining) if models else remaining
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    try:
+                        return task.result()
+                    except TRANSIENT_ERRORS as e:
+                        transient_error = e
+                    except Exception as e:
+                        fatal_error = fatal_error or e
+
+                # Hedge on a slow request, fail over on an error
+                if models:
+                    pending.add(self._submit(models.pop(0), messages, temperature, deadline))
+        finally:
+            # Abort the losers so they free their connections right away
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+        if transient_error is not None:
+            raise transient_error
+        if fatal_error is not None:
+            raise fatal_error
+        raise TimeoutError(f"No LLM response within {self.config['deadline']}s")
+
+    def _submit(self, model: str, messages: list, temperature: float, deadline: float) -> asyncio.Task:
+        return asyncio.ensure_future(self._request(model, messages, temperature, deadline))
+
+    async def _request(self, model: str, messages: list, temperature: float, deadline: float) -> str:
+        # Measured when the request actually starts, bounded by the overall deadline
+        timeout = max(min(self.config['request_timeout'], deadline - time.monotonic()), 0.001)
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            timeout=timeout,
+        )
+        return response.choices[0].message.content
+
+    def close(self):
+        """Stop the request loop and close the underlying HTTP client"""
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        cap = min(self.config['backoff_max'], self.config['backoff_base'] * (2 ** attempt))
+        return random.uniform(0, cap)
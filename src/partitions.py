@@ -0,0 +1,505 @@
+"""
+AsOfDate-partitioned storage for holdings snapshots
+"""
+import ast
+import json
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from config import PARTITION_CONFIG
+
+
+CATALOG_FILE = "catalog.json"
+
+# Operators that bound a date column, as (lower_inclusive, upper_inclusive)
+_COMPARE_BOUNDS = {
+    ast.Eq: ("lo", "hi"),
+    ast.GtE: ("lo",),
+    ast.Gt: ("lo",),
+    ast.LtE: ("hi",),
+    ast.Lt: ("hi",),
+}
+_FLIPPED = {ast.GtE: ast.LtE, ast.Gt: ast.Lt, ast.LtE: ast.GtE, ast.Lt: ast.Gt, ast.Eq: ast.Eq}
+
+# Accessors that may be applied to a column inside a filter mask without
+# looking at rows outside the filtered frame
+_ELEMENTWISE_ATTRS = {
+    "str", "dt", "lower", "upper", "strip", "between", "isin",
+    "isna", "notna", "isnull", "notnull", "date", "normalize",
+    "year", "month", "day", "contains", "startswith", "endswith",
+}
+_MASK_NODES = (ast.Attribute, ast.Call, ast.Compare, ast.BinOp, ast.UnaryOp, ast.BoolOp)
+
+
+def _normalize_date_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert all date columns to datetime objects (same rule as the chatbot)"""
+    for col in df.columns:
+        if 'date' in col.lower() and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    return df
+
+
+class DateRange:
+    """Closed interval of timestamps; None means unbounded on that side"""
+
+    def __init__(self, lo: Optional[pd.Timestamp] = None, hi: Optional[pd.Timestamp] = None):
+        self.lo = lo
+        self.hi = hi
+
+    @property
+    def bounded(self) -> bool:
+        return self.lo is not None or self.hi is not None
+
+    def intersect(self, other: "DateRange") -> "DateRange":
+        lo = max((d for d in (self.lo, other.lo) if d is not None), default=None)
+        hi = min((d for d in (self.hi, other.hi) if d is not None), default=None)
+        return DateRange(lo, hi)
+
+    def union(self, other: "DateRange") -> "DateRange":
+        """Smallest range covering both"""
+        lo = None if None in (self.lo, other.lo) else min(self.lo, other.lo)
+        hi = None if None in (self.hi, other.hi) else max(self.hi, other.hi)
+        return DateRange(lo, hi)
+
+    def overlaps(self, lo: Optional[pd.Timestamp], hi: Optional[pd.Timestamp]) -> bool:
+        if lo is None or hi is None:
+            return False
+        if self.lo is not None and hi < self.lo:
+            return False
+        if self.hi is not None and lo > self.hi:
+            return False
+        return True
+
+    def __repr__(self):
+        return f"DateRange({self.lo}, {self.hi})"
+
+
+class _PredicateScanner:
+    """
+    Extract date ranges that every access to a frame is filtered by
+
+    Pruning must never drop rows the code could see, so a column only gets a
+    range when *every* reference to the frame sits inside a boolean filter
+    (``df[mask]`` or chained ``df[mask1][mask2]``) and each of those filters
+    bounds that column. Anything else (aggregates, ``.loc``, ``.query``,
+    aliasing) results in a full scan.
+    """
+
+    def __init__(self, frame_name: str, columns: list):
+        self.frame_name = frame_name
+        self.columns = columns
+        self.constants = {}
+
+    def scan(self, code: str) -> dict:
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return {}
+
+        self._collect_constants(tree)
+        parents = {}
+        for node in ast.walk(tree):
+            for child in ast.iter_child_nodes(node):
+                parents[child] = node
+
+        refs = [n for n in ast.walk(tree) if isinstance(n, ast.Name) and n.id == self.frame_name]
+        if not refs:
+            return {}
+
+        filters = {}
+        for ref in refs:
+            outer = self._enclosing_filter(ref, parents)
+            if outer is None:
+                return {}
+            filters[id(outer)] = outer
+
+        ranges = {}
+        for col in self.columns:
+            col_range = None
+            for outer in filters.values():
+                chain_range = DateRange()
+                for mask in self._masks(outer):
+                    chain_range = chain_range.intersect(self._mask_range(mask, col))
+                if not chain_range.bounded:
+                    col_range = None
+                    break
+                col_range = chain_range if col_range is None else col_range.union(chain_range)
+            if col_range is not None and col_range.bounded:
+                ranges[col] = col_range
+        return ranges
+
+    def _collect_constants(self, tree: ast.Module):
+        """
+        Remember ``name = <date literal>`` assignments that are safe to inline
+
+        Control flow is not tracked, so a name only counts as a constant when
+        it is bound exactly once in the whole code, by a module-level statement.
+        """
+        stores = {}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+                stores[node.id] = stores.get(node.id, 0) + 1
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                stores[node.name] = stores.get(node.name, 0) + 1
+            elif isinstance(node, ast.arg):
+                stores[node.arg] = stores.get(node.arg, 0) + 1
+
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                name = node.targets[0].id
+                if stores.get(name) != 1:
+                    continue
+                value = self._literal_date(node.value)
+                if value is not None:
+                    self.constants[name] = value
+
+    def _literal_date(self, node: ast.AST) -> Optional[pd.Timestamp]:
+        """Evaluate a date literal such as ``'2023-08-01'`` or ``pd.to_datetime('04-03-2020')``"""
+        if isinstance(node, ast.Name) and node.id in self.constants:
+            return self.constants[node.id]
+        names = {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
+        if not names <= {"pd", "datetime"}:
+            return None
+        if not names and not (isinstance(node, ast.Constant) and isinstance(node.value, str)):
+            return None
+        try:
+            value = eval(compile(ast.Expression(node), "<predicate>", "eval"),
+                         {"__builtins__": {}, "pd": pd, "datetime": datetime})
+            value = pd.Timestamp(value)
+        except Exception:
+            return None
+        return None if pd.isna(value) else value
+
+    def _is_column(self, node: ast.AST, col: Optional[str] = None) -> bool:
+        """Whether node is ``frame['col']``"""
+        return (
+            isinstance(node, ast.Subscript)
+            and isinstance(node.value, ast.Name)
+            and node.value.id == self.frame_name
+            and isinstance(node.slice, ast.Constant)
+            and isinstance(node.slice.value, str)
+            and (col is None or node.slice.value == col)
+        )
+
+    def _enclosing_filter(self, ref: ast.Name, parents: dict) -> Optional[ast.Subscript]:
+        """Return the outermost ``frame[mask]...[mask]`` chain that contains ref"""
+        parent = parents.get(ref)
+        if not (isinstance(parent, ast.Subscript) and parent.value is ref):
+            return None
+        if not self._is_column(parent):
+            return self._outer_chain(parent, parents)
+
+        # A column reference must only be used element-wise inside a mask
+        node, parent = parent, parents.get(parent)
+        while parent is not None:
+            if isinstance(parent, ast.Subscript) and parent.slice is node:
+                root = parent
+                while isinstance(root, ast.Subscript) and not self._is_column(root):
+                    root = root.value
+                if isinstance(root, ast.Name) and root.id == self.frame_name:
+                    return self._outer_chain(parent, parents)
+                return None
+            if isinstance(parent, ast.Attribute) and parent.attr not in _ELEMENTWISE_ATTRS:
+                return None
+            # Calls are only allowed as element-wise methods on the column
+            # (e.g. ``.str.lower()``); passing the column as an argument
+            # (``max(col)``, ``np.mean(col)``) may aggregate across all rows
+            if isinstance(parent, ast.Call) and parent.func is not node:
+                return None
+            if not isinstance(parent, _MASK_NODES):
+                return None
+            node, parent = parent, parents.get(parent)
+        return None
+
+    def _outer_chain(self, node: ast.Subscript, parents: dict) -> ast.Subscript:
+        parent = parents.get(node)
+        while isinstance(parent, ast.Subscript) and parent.value is node and not self._is_slice_column(parent):
+            node = parent
+            parent = parents.get(node)
+        return node
+
+    @staticmethod
+    def _is_slice_column(node: ast.Subscript) -> bool:
+        return isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str)
+
+    def _masks(self, chain: ast.Subscript) -> list:
+        masks = []
+        node = chain
+        while isinstance(node, ast.Subscript):
+            masks.append(node.slice)
+            node = node.value
+        return masks
+
+    def _mask_range(self, mask: ast.AST, col: str) -> DateRange:
+        """Range implied by a boolean mask for col; unbounded when unknown"""
+        if isinstance(mask, ast.BinOp) and isinstance(mask.op, ast.BitAnd):
+            return self._mask_range(mask.left, col).intersect(self._mask_range(mask.right, col))
+
+        if isinstance(mask, ast.Compare) and len(mask.ops) == 1:
+            left, op, right = mask.left, type(mask.ops[0]), mask.comparators[0]
+            if self._is_column(right, col):
+                left, right, op = right, left, _FLIPPED.get(op)
+            if op in _COMPARE_BOUNDS and self._is_column(left, col):
+                value = self._literal_date(right)
+                if value is not None:
+                    bounds = _COMPARE_BOUNDS[op]
+                    return DateRange(value if "lo" in bounds else None, value if "hi" in bounds else None)
+
+        if (
+            isinstance(mask, ast.Call)
+            and isinstance(mask.func, ast.Attribute)
+            and mask.func.attr == "between"
+            and self._is_column(mask.func.value, col)
+            and len(mask.args) >= 2
+        ):
+            return DateRange(self._literal_date(mask.args[0]), self._literal_date(mask.args[1]))
+
+        return DateRange()
+
+
+def _references(code: str, name: str) -> bool:
+    """Whether code mentions the variable name (unparseable code never runs, so False)"""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return False
+    return any(isinstance(n, ast.Name) and n.id == name for n in ast.walk(tree))
+
+
+def extract_date_ranges(code: str, frame_name: str = "holdings_df", columns: list = None) -> dict:
+    """
+    Find the date ranges generated code filters a frame by
+
+    Args:
+        code: Generated Python code
+        frame_name: Variable name of the frame in the code
+        columns: Date columns to look for (uses config default if None)
+
+    Returns:
+        Dict of column name to DateRange, only for columns that bound every access
+    """
+    if columns is None:
+        columns = PARTITION_CONFIG['prunable_columns']
+    return _PredicateScanner(frame_name, columns).scan(code)
+
+
+class HoldingsPartitionStore:
+    """
+    Holdings snapshots stored as one file per AsOfDate with a JSON catalog
+
+    Only the latest snapshot stays resident; older partitions are read on
+    demand and kept in a small LRU cache. Unfiltered questions need every
+    snapshot; the full concatenation is only cached when the history has at
+    most PARTITION_CONFIG['full_scan_cache_max_rows'] rows (0, the default,
+    never caches it).
+    """
+
+    def __init__(self, partition_dir: Path, cache_size: int = None, full_scan_cache_max_rows: int = None):
+        """
+        Open an existing partition directory
+
+        Args:
+            partition_dir: Directory holding the partitions and catalog
+            cache_size: Number of non-latest partitions kept in memory (uses config default if None)
+            full_scan_cache_max_rows: Keep the concatenation of all partitions after a full scan
+                if it has at most this many rows (uses config default if None)
+        """
+        self.partition_dir = Path(partition_dir)
+        self.cache_size = PARTITION_CONFIG['cache_size'] if cache_size is None else cache_size
+        self.full_scan_cache_max_rows = (
+            PARTITION_CONFIG['full_scan_cache_max_rows'] if full_scan_cache_max_rows is None
+            else full_scan_cache_max_rows
+        )
+        self._full_df = None
+        self.catalog = json.loads((self.partition_dir / CATALOG_FILE).read_text())
+        self.partition_column = self.catalog['partition_column']
+        self._cache = OrderedDict()
+
+        latest = self.latest_key()
+        self._latest_df = self._read(latest) if latest is not None else self._empty()
+
+    @classmethod
+    def build(cls, holdings_df: pd.DataFrame, partition_dir: Path, source: dict = None, **kwargs) -> "HoldingsPartitionStore":
+        """
+        Write holdings_df as per-AsOfDate partitions and open the result
+
+        Args:
+            holdings_df: Holdings data containing every snapshot
+            partition_dir: Directory to write partitions to
+            source: Optional source file fingerprint stored in the catalog
+
+        Returns:
+            Opened HoldingsPartitionStore
+        """
+        partition_dir = Path(partition_dir)
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        for old in partition_dir.glob("*.pkl"):
+            old.unlink()
+
+        column = PARTITION_CONFIG['partition_column']
+        df = _normalize_date_columns(holdings_df.copy())
+
+        partitions = []
+        for key, part in df.groupby(df[column].dt.strftime("%Y-%m-%d"), dropna=False, sort=True):
+            key = None if pd.isna(key) else key
+            path = f"{column}={key or 'unknown'}.pkl"
+            part.reset_index(drop=True).to_pickle(partition_dir / path)
+
+            entry = {"key": key, "path": path, "rows": len(part), "ranges": {}}
+            for col in PARTITION_CONFIG['prunable_columns']:
+                values = part[col].dropna() if col in part.columns else pd.Series(dtype="datetime64[ns]")
+                entry["ranges"][col] = [
+                    values.min().isoformat() if len(values) else None,
+                    values.max().isoformat() if len(values) else None,
+                ]
+            partitions.append(entry)
+
+        catalog = {
+            "partition_column": column,
+            "columns": list(df.columns),
+            "dtypes": {c: str(t) for c, t in df.dtypes.items()},
+            "source": source or {},
+            "partitions": partitions,
+        }
+        (partition_dir / CATALOG_FILE).write_text(json.dumps(catalog, indent=2))
+        return cls(partition_dir, **kwargs)
+
+    @classmethod
+    def from_csv(cls, csv_path: Path, partition_dir: Path = None, **kwargs) -> "HoldingsPartitionStore":
+        """
+        Open the partitions for csv_path, rebuilding them if the CSV changed
+
+        Args:
+            csv_path: Path to the holdings CSV
+            partition_dir: Directory for partitions (uses config default if None)
+
+        Returns:
+            Opened HoldingsPartitionStore
+        """
+        csv_path = Path(csv_path)
+        partition_dir = Path(partition_dir or PARTITION_CONFIG['partition_dir'])
+        stat = csv_path.stat()
+        source = {"path": str(csv_path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+        catalog_path = partition_dir / CATALOG_FILE
+        if catalog_path.exists():
+            try:
+                if json.loads(catalog_path.read_text()).get("source") == source:
+                    return cls(partition_dir, **kwargs)
+            except ValueError:
+                pass
+
+        return cls.build(pd.read_csv(csv_path), partition_dir, source=source, **kwargs)
+
+    @property
+    def keys(self) -> list:
+        """Partition keys (ISO dates) in ascending order; undated rows last"""
+        return [p["key"] for p in self.catalog["partitions"]]
+
+    @property
+    def num_rows(self) -> int:
+        return sum(p["rows"] for p in self.catalog["partitions"])
+
+    def latest_key(self) -> Optional[str]:
+        dated = [k for k in self.keys if k is not None]
+        return max(dated) if dated else None
+
+    def latest(self) -> pd.DataFrame:
+        """The resident latest snapshot"""
+        return self._latest_df
+
+    def prune(self, ranges: dict) -> list:
+        """
+        Select partitions that may contain rows matching the given date ranges
+
+        Args:
+            ranges: Dict of column name to DateRange (see extract_date_ranges)
+
+        Returns:
+            List of partition keys to read
+        """
+        keys = []
+        for entry in self.catalog["partitions"]:
+            keep = True
+            for col, date_range in ranges.items():
+                lo, hi = entry["ranges"].get(col, [None, None])
+                if not date_range.overlaps(lo and pd.Timestamp(lo), hi and pd.Timestamp(hi)):
+                    keep = False
+                    break
+            if keep:
+                keys.append(entry["key"])
+        return keys
+
+    def load(self, keys: list = None) -> pd.DataFrame:
+        """
+        Load and concatenate partitions
+
+        Args:
+            keys: Partition keys to load (all partitions if None)
+
+        Returns:
+            Holdings DataFrame for the selected snapshots
+        """
+        if keys is None or list(keys) == self.keys:
+            return self._load_all()
+        frames = [self._get(k) for k in keys]
+        if not frames:
+            return self._empty()
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True)
+
+    def scan_for_code(self, code: str, frame_name: str = "holdings_df") -> pd.DataFrame:
+        """Load only the partitions the date predicates in code can touch"""
+        if not _references(code, frame_name):
+            # e.g. trades-only questions: nothing to load beyond the resident snapshot
+            return self.latest()
+        ranges = extract_date_ranges(code, frame_name)
+        if not ranges:
+            return self.load()
+        return self.load(self.prune(ranges))
+
+    def _load_all(self) -> pd.DataFrame:
+        if self._full_df is not None:
+            return self._full_df
+
+        frames = [self._get(k) for k in self.keys]
+        if not frames:
+            df = self._empty()
+        elif len(frames) == 1:
+            df = frames[0]
+        else:
+            df = pd.concat(frames, ignore_index=True)
+        if 0 < len(df) <= self.full_scan_cache_max_rows:
+            self._full_df = df
+        return df
+
+    def _entry(self, key: Optional[str]) -> dict:
+        for entry in self.catalog["partitions"]:
+            if entry["key"] == key:
+                return entry
+        raise KeyError(f"No holdings partition for {self.partition_column}={key}")
+
+    def _read(self, key: Optional[str]) -> pd.DataFrame:
+        return pd.read_pickle(self.partition_dir / self._entry(key)["path"])
+
+    def _get(self, key: Optional[str]) -> pd.DataFrame:
+        if key == self.latest_key():
+            return self._latest_df
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        df = self._read(key)
+        if self.cache_size > 0:
+            self._cache[key] = df
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return df
+
+    def _empty(self) -> pd.DataFrame:
+        return pd.DataFrame({c: pd.Series(dtype=t) for c, t in self.catalog["dtypes"].items()})
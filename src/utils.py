@@ -11,11 +11,18 @@ def format_result(result: Any) -> str:
     Format result for display
     
     Args:
-        result: The result to format (can be str, int, float, Series, DataFrame)
+        result: The result to format (can be str, int, float, Series, DataFrame,
+                or a dict of sub-question to any of those)
         
     Returns:
         Formatted string representation of the result
     """
+    if isinstance(result, dict):
+        if len(result) == 0:
+            return RESPONSE_CONFIG['empty_result_message']
+        lines = [f"  • {question}: {format_result(answer)}" for question, answer in result.items()]
+        return "\n" + "\n".join(lines)
+    
     if isinstance(result, str):
         return result
     
@@ -87,20 +94,25 @@ def validate_dataframes(holdings_df: pd.DataFrame, trades_df: pd.DataFrame) -> t
     return True, ""
 
 
-def get_data_summary(holdings_df: pd.DataFrame, trades_df: pd.DataFrame) -> str:
+def get_data_summary(holdings_df: pd.DataFrame, trades_df: pd.DataFrame, holdings_store=None) -> str:
     """
     Get a summary of the loaded data
     
     Args:
         holdings_df: Holdings DataFrame
         trades_df: Trades DataFrame
+        holdings_store: Optional HoldingsPartitionStore; its row count covers every AsOfDate snapshot
         
     Returns:
         Summary string
     """
+    holdings_info = f"{len(holdings_df):,} records"
+    if holdings_store is not None:
+        holdings_info = f"{holdings_store.num_rows:,} records in {len(holdings_store.keys)} AsOfDate snapshots"
+    
     summary = f"""
 📊 Data Summary:
-   Holdings: {len(holdings_df):,} records
+   Holdings: {holdings_info}
    Trades: {len(trades_df):,} records
    
    Holdings Columns: {', '.join(holdings_df.columns)}
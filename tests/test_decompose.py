@@ -0,0 +1,127 @@
+"""
+Test cases for compound question decomposition and shared scans
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+from src import GrokFinancialChatbot, SharedScan, find_entities, is_compound_question, format_result
+
+
+class FakeCompletions:
+    """Returns canned code and records the prompts it was sent"""
+
+    def __init__(self, code):
+        self.code = code
+        self.calls = []
+
+    async def create(self, model, messages, temperature, timeout):
+        self.calls.append(messages)
+        message = type("Message", (), {"content": self.code})
+        choice = type("Choice", (), {"message": message})
+        return type("Response", (), {"choices": [choice]})
+
+
+class FakeClient:
+    def __init__(self, code):
+        self.chat = type("Chat", (), {"completions": FakeCompletions(code)})
+
+    def with_options(self, **kwargs):
+        return self
+
+
+def make_frames():
+    holdings_df = pd.DataFrame({
+        "PortfolioName": ["Garfield", "Garfield", "HoldCo 1", "HoldCo 3"],
+        "PL_YTD": [10.0, 5.0, 30.0, -2.0],
+    })
+    trades_df = pd.DataFrame({"PortfolioName": ["HoldCo 1", "holdco 1", "Garfield"]})
+    return holdings_df, trades_df
+
+
+def test_is_compound_question():
+    """Several known entities or several clauses make a question compound"""
+    entities = ["Garfield", "HoldCo 1", "HoldCo 3", "HoldCo 11"]
+
+    assert is_compound_question(
+        "total holdings and trades for Garfield, HoldCo 1 and HoldCo 3, and which had the best PL_YTD", entities
+    )
+    assert is_compound_question("Total quantity for Garfield and HoldCo 1", entities)
+    assert is_compound_question("Compare PL_YTD for Garfield and HoldCo 1", entities)
+    assert is_compound_question("Total holdings for Garfield, HoldCo 1", entities)
+    assert is_compound_question("Total holdings for Garfield? Total trades for Garfield?", entities)
+
+    assert not is_compound_question(
+        "Total quantity for Garfield between 04-03-2020 and 05-03-2020, grouped by strategy", entities
+    )
+    assert not is_compound_question("Which funds performed better based on yearly Profit and Loss", entities)
+    assert not is_compound_question("Total number of holdings for Garfield", entities)
+    assert not is_compound_question("Holdings with Qty above 1,000,000", entities)
+    assert not is_compound_question("Total holdings for Garfield?Thanks", entities)
+    assert not is_compound_question("Total holdings for Garfield; thanks!", entities)
+    assert not is_compound_question("Total trades for HoldCo 11", entities)
+
+
+def test_find_entities():
+    """Entities match case-insensitively on whole names, longest first"""
+    entities = ["Garfield", "HoldCo 1", "HoldCo 11"]
+
+    assert find_entities("trades for holdco 11 and GARFIELD", entities) == ["HoldCo 11", "Garfield"]
+    assert find_entities("trades for HoldCo 1", entities) == ["HoldCo 1"]
+    assert find_entities("trades for HoldCo 12", entities) == []
+
+
+def test_split_by_shares_one_scan():
+    """Repeated splits of the same frame and column reuse one groupby"""
+    holdings_df, _ = make_frames()
+    scan = SharedScan()
+
+    first = scan.split_by(holdings_df, "PortfolioName", ["garfield", "HoldCo 1"])
+    second = scan.split_by(holdings_df, "PortfolioName", ["HOLDCO 3", "Missing"])
+
+    assert len(first["garfield"]) == 2
+    assert len(first["HoldCo 1"]) == 1
+    assert len(second["HOLDCO 3"]) == 1
+    assert len(second["Missing"]) == 0
+    assert len(scan._indices) == 1
+
+
+def test_compound_ask_formats_results():
+    """A compound question is answered by one LLM call and formatted together"""
+    code = (
+        "names = ['Garfield', 'HoldCo 1', 'HoldCo 3']\n"
+        "holdings = split_by(holdings_df, 'PortfolioName', names)\n"
+        "trades = split_by(trades_df, 'PortfolioName', names)\n"
+        "results = {}\n"
+        "for name in names:\n"
+        "    results[f'Total holdings for {name}'] = len(holdings[name])\n"
+        "    results[f'Total trades for {name}'] = len(trades[name])\n"
+        "results['Best PL_YTD'] = max(names, key=lambda n: holdings[n]['PL_YTD'].sum())\n"
+    )
+    holdings_df, trades_df = make_frames()
+    client = FakeClient(code)
+    chatbot = GrokFinancialChatbot(holdings_df, trades_df, client)
+
+    answer = chatbot.ask("total holdings and trades for Garfield, HoldCo 1 and HoldCo 3, and which had the best PL_YTD")
+
+    assert len(client.chat.completions.calls) == 1
+    assert "COMPOUND QUESTION RULES" in client.chat.completions.calls[0][0]["content"]
+    assert "  • Total holdings for Garfield: 2" in answer
+    assert "  • Total trades for HoldCo 1: 2" in answer
+    assert "  • Best PL_YTD: HoldCo 1" in answer
+    assert format_result({}) == "No results found"
+
+
+def test_single_question_ignores_scratch_results():
+    """A 'results' dict only replaces 'result' for compound questions"""
+    code = (
+        "results = holdings_df.groupby('PortfolioName')['PL_YTD'].sum().to_dict()\n"
+        "result = max(results, key=results.get)\n"
+    )
+    holdings_df, trades_df = make_frames()
+    chatbot = GrokFinancialChatbot(holdings_df, trades_df, FakeClient(code))
+
+    assert chatbot.ask("Which fund has the best PL_YTD") == "HoldCo 1"
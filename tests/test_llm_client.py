@@ -0,0 +1,178 @@
+"""
+Test cases for the LLM request layer against a local stub server
+"""
+import sys
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from groq import NotFoundError
+from src import LLMRequestLayer, create_groq_client
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible chat completions endpoint with injected latency and failures"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        model = body["model"]
+        behaviour = self.server.behaviours.get(model, {})
+        with self.server.lock:
+            self.server.calls.append(model)
+            failures = behaviour.get("failures", 0)
+            if failures:
+                behaviour["failures"] = failures - 1
+
+        time.sleep(behaviour.get("delay", 0))
+        if failures:
+            self._send(500, {"error": {"message": "injected failure"}})
+            return
+        if "status" in behaviour:
+            self._send(behaviour["status"], {"error": {"message": "injected status"}})
+            return
+        self._send(200, {
+            "id": "stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"result = '{model}'"},
+                "finish_reason": "stop",
+            }],
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """Start a stub server; tests set server.behaviours per model"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.behaviours = {}
+    server.calls = []
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_layer(server, **config):
+    """Request layer pointed at the stub server with fast test timings"""
+    cfg = {"deadline": 5.0, "request_timeout": 5.0, "hedge_delay": 0.1,
+           "max_retries": 2, "backoff_base": 0.01, "backoff_max": 0.05, **config}
+    client = create_groq_client("test-key", base_url=f"http://127.0.0.1:{server.server_port}", config=cfg)
+    return LLMRequestLayer(client, models=["primary", "secondary"], config=cfg)
+
+
+MESSAGES = [{"role": "user", "content": "Total number of holdings for Garfield"}]
+
+
+def test_hedge_to_second_model(stub_server):
+    """A slow primary is hedged and the faster secondary wins"""
+    stub_server.behaviours = {"primary": {"delay": 5.0}}
+    layer = make_layer(stub_server)
+
+    start = time.monotonic()
+    assert layer.complete(MESSAGES) == "result = 'secondary'"
+    assert time.monotonic() - start < 4.0
+
+
+def test_fast_primary_is_not_hedged(stub_server):
+    """No hedge is sent when the primary answers within the hedge delay"""
+    layer = make_layer(stub_server, hedge_delay=3.0)
+
+    assert layer.complete(MESSAGES) == "result = 'primary'"
+    assert stub_server.calls == ["primary"]
+
+
+def test_retry_transient_errors(stub_server):
+    """Server errors fail over and are retried until a model succeeds"""
+    stub_server.behaviours = {"primary": {"failures": 1}, "secondary": {"failures": 1}}
+    layer = make_layer(stub_server)
+
+    assert layer.complete(MESSAGES) == "result = 'primary'"
+    assert stub_server.calls == ["primary", "secondary", "primary"]
+
+
+def test_non_transient_hedge_error_waits_for_primary(stub_server):
+    """A non-transient error from the hedge does not abandon a slower primary"""
+    stub_server.behaviours = {"primary": {"delay": 0.5}, "secondary": {"status": 404}}
+    layer = make_layer(stub_server)
+
+    assert layer.complete(MESSAGES) == "result = 'primary'"
+    assert stub_server.calls == ["primary", "secondary"]
+
+
+def test_non_transient_error_when_all_fail(stub_server):
+    """Non-transient errors are raised once no request is left in flight"""
+    stub_server.behaviours = {"primary": {"status": 404}, "secondary": {"status": 404}}
+    layer = make_layer(stub_server)
+
+    with pytest.raises(NotFoundError):
+        layer.complete(MESSAGES)
+    assert stub_server.calls == ["primary", "secondary"]
+
+
+def test_close(stub_server):
+    """Closing the layer shuts down its threads and HTTP connections"""
+    with make_layer(stub_server) as layer:
+        assert layer.complete(MESSAGES) == "result = 'primary'"
+
+    assert layer.client._client.is_closed
+    assert not layer._thread.is_alive()
+    with pytest.raises(RuntimeError):
+        layer.complete(MESSAGES)
+
+
+def test_back_to_back_calls_with_slow_primary(stub_server):
+    """Losing hedges are aborted, so later calls never queue behind them"""
+    stub_server.behaviours = {"primary": {"delay": 5.0}}
+    layer = make_layer(stub_server, max_connections=2, max_keepalive_connections=2)
+
+    for _ in range(6):
+        start = time.monotonic()
+        assert layer.complete(MESSAGES) == "result = 'secondary'"
+        assert time.monotonic() - start < 2.5
+    layer.close()
+
+
+def test_sync_client_is_wrapped(stub_server):
+    """A plain Groq client still works with the request layer"""
+    from groq import Groq
+
+    client = Groq(api_key="test-key", base_url=f"http://127.0.0.1:{stub_server.server_port}")
+    with LLMRequestLayer(client, models=["primary"], config={"hedge_delay": 3.0}) as layer:
+        assert layer.complete(MESSAGES) == "result = 'primary'"
+
+
+def test_deadline(stub_server):
+    """The call gives up once the overall deadline passes"""
+    stub_server.behaviours = {"primary": {"delay": 5.0}, "secondary": {"delay": 5.0}}
+    layer = make_layer(stub_server, deadline=0.5)
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        layer.complete(MESSAGES)
+    assert time.monotonic() - start < 4.0
@@ -0,0 +1,167 @@
+"""
+Test cases for AsOfDate-partitioned holdings storage
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+from src import HoldingsPartitionStore, extract_date_ranges, get_data_summary
+
+
+def make_holdings():
+    """Three daily snapshots of two positions"""
+    rows = []
+    for asof in ["01/08/23", "01/09/23", "01/10/23"]:
+        rows.append({"AsOfDate": asof, "OpenDate": "04/03/20", "PortfolioName": "Garfield", "Qty": 10})
+        rows.append({"AsOfDate": asof, "OpenDate": "06/01/22", "PortfolioName": "HoldCo 1", "Qty": 5})
+    return pd.DataFrame(rows)
+
+
+def test_build_and_latest(tmp_path):
+    """Each AsOfDate becomes one partition and only the latest is resident"""
+    store = HoldingsPartitionStore.build(make_holdings(), tmp_path)
+
+    assert store.keys == ["2023-01-08", "2023-01-09", "2023-01-10"]
+    assert store.num_rows == 6
+    assert (store.latest()["AsOfDate"] == pd.Timestamp("2023-01-10")).all()
+    assert len(store.load()) == 6
+
+
+def test_full_scan_cache_is_bounded(tmp_path):
+    """The full history is only kept in memory when it fits the row limit"""
+    code = "result = len(holdings_df[holdings_df['PortfolioName'].str.lower() == 'garfield'])"
+
+    store = HoldingsPartitionStore.build(make_holdings(), tmp_path, cache_size=0)
+    assert store.scan_for_code(code) is not store.scan_for_code(code)
+    assert store._full_df is None
+
+    store = HoldingsPartitionStore(tmp_path, cache_size=0, full_scan_cache_max_rows=5)
+    store.scan_for_code(code)
+    assert store._full_df is None
+
+    store = HoldingsPartitionStore(tmp_path, cache_size=0, full_scan_cache_max_rows=6)
+    assert store.scan_for_code(code) is store.scan_for_code(code)
+    assert "6 records in 3 AsOfDate snapshots" in get_data_summary(store.latest(), pd.DataFrame(), store)
+
+
+def test_code_without_holdings_loads_nothing(tmp_path):
+    """Questions that never touch holdings_df do not read any partition"""
+    store = HoldingsPartitionStore.build(make_holdings(), tmp_path, cache_size=2)
+
+    assert store.scan_for_code("result = len(trades_df)") is store.latest()
+    assert len(store._cache) == 0
+    assert store._full_df is None
+
+
+def test_extract_date_ranges():
+    """Only predicates bounding every access to holdings_df produce a range"""
+    code = "result = holdings_df[holdings_df['AsOfDate'] == pd.to_datetime('01/09/23')]['Qty'].sum()"
+    ranges = extract_date_ranges(code)
+    assert ranges["AsOfDate"].lo == ranges["AsOfDate"].hi == pd.Timestamp("2023-01-09")
+
+    chained = (
+        "d = pd.to_datetime('2023-01-09')\n"
+        "result = holdings_df[holdings_df['PortfolioName'].str.lower() == 'garfield']"
+        "[holdings_df['AsOfDate'] >= d]['Qty'].sum()"
+    )
+    assert extract_date_ranges(chained)["AsOfDate"].lo == pd.Timestamp("2023-01-09")
+
+    unfiltered = (
+        "x = holdings_df[holdings_df['AsOfDate'] == pd.to_datetime('01/09/23')]['Qty'].sum()\n"
+        "result = x / holdings_df['Qty'].sum()"
+    )
+    assert extract_date_ranges(unfiltered) == {}
+
+
+def test_filtered_frame_passed_to_split_by_is_pruned():
+    """Date filters applied before split_by keep partition pruning"""
+    code = (
+        "names = ['Garfield', 'HoldCo 1']\n"
+        "groups = split_by(holdings_df[holdings_df['AsOfDate'] == pd.to_datetime('2023-01-10')], 'PortfolioName', names)\n"
+        "results = {name: len(groups[name]) for name in names}"
+    )
+    assert extract_date_ranges(code)["AsOfDate"].lo == pd.Timestamp("2023-01-10")
+    assert extract_date_ranges("groups = split_by(holdings_df, 'PortfolioName', ['Garfield'])") == {}
+
+
+def test_decomposition_prompt_example_is_pruned():
+    """The worked example the model copies for compound questions filters dates first"""
+    from config import DECOMPOSITION_PROMPT_TEMPLATE
+
+    example = DECOMPOSITION_PROMPT_TEMPLATE.format().split("```python")[1].split("```")[0]
+    assert extract_date_ranges(example)["AsOfDate"].lo == pd.Timestamp("2023-01-08")
+
+
+def test_aggregates_in_mask_force_full_scan():
+    """A column passed to a call inside a mask may aggregate over every snapshot"""
+    mask = "(holdings_df['AsOfDate'] >= '2023-01-09') & "
+    for term in [
+        "(holdings_df['Qty'] == max(holdings_df['Qty']))",
+        "(holdings_df['Qty'] == sum(holdings_df['Qty']))",
+        "(holdings_df['Qty'] < len(holdings_df['Qty']))",
+        "(holdings_df['Qty'] == np.mean(holdings_df['Qty']))",
+        "(holdings_df['Qty'] == holdings_df['Qty'].max())",
+    ]:
+        code = f"result = len(holdings_df[{mask}{term}])"
+        assert extract_date_ranges(code) == {}, term
+
+    code = f"result = len(holdings_df[{mask}(holdings_df['PortfolioName'].str.lower().isin(['garfield']))])"
+    assert "AsOfDate" in extract_date_ranges(code)
+
+
+def test_reassigned_names_are_not_constants():
+    """Date variables bound more than once (or inside a block) are not inlined"""
+    reassigned = (
+        "d = '2023-01-08'\n"
+        "a = len(holdings_df[holdings_df['AsOfDate'] == d])\n"
+        "d = '2023-01-10'\n"
+        "result = a + len(holdings_df[holdings_df['AsOfDate'] == d])"
+    )
+    assert extract_date_ranges(reassigned) == {}
+
+    conditional = (
+        "d = '2023-01-08'\n"
+        "if len(trades_df) > 0:\n"
+        "    d = '2023-01-10'\n"
+        "result = len(holdings_df[holdings_df['AsOfDate'] == d])"
+    )
+    assert extract_date_ranges(conditional) == {}
+
+    nested = (
+        "if True:\n"
+        "    d = '2023-01-10'\n"
+        "result = len(holdings_df[holdings_df['AsOfDate'] == d])"
+    )
+    assert extract_date_ranges(nested) == {}
+
+
+def test_scan_prunes_partitions(tmp_path):
+    """Generated code only sees partitions matching its date predicates"""
+    store = HoldingsPartitionStore.build(make_holdings(), tmp_path, cache_size=0)
+
+    code = "result = holdings_df[holdings_df['AsOfDate'].between('2023-01-08', '2023-01-09')]"
+    assert store.prune(extract_date_ranges(code)) == ["2023-01-08", "2023-01-09"]
+
+    scanned = store.scan_for_code(code)
+    local_vars = {"holdings_df": scanned, "pd": pd}
+    exec(code, {}, local_vars)
+    assert len(local_vars["result"]) == 4
+
+    code = "result = holdings_df[holdings_df['OpenDate'] > pd.to_datetime('2023-01-01')]"
+    assert store.prune(extract_date_ranges(code)) == []
+
+
+def test_from_csv_reuses_catalog(tmp_path):
+    """Partitions are rebuilt only when the source CSV changes"""
+    csv_path = tmp_path / "holdings.csv"
+    make_holdings().to_csv(csv_path, index=False)
+
+    store = HoldingsPartitionStore.from_csv(csv_path, tmp_path / "parts")
+    catalog_mtime = (tmp_path / "parts" / "catalog.json").stat().st_mtime_ns
+    reopened = HoldingsPartitionStore.from_csv(csv_path, tmp_path / "parts")
+
+    assert reopened.keys == store.keys
+    assert (tmp_path / "parts" / "catalog.json").stat().st_mtime_ns == catalog_mtime